@@ -1,19 +1,454 @@
 import logging
+import multiprocessing
 import os
+import random
+import shutil
 import sys
 import time
 from collections import deque
-from pickle import Pickler, Unpickler
-from random import shuffle
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from pickle import HIGHEST_PROTOCOL, Pickler, Unpickler
 
 import numpy as np
 from tqdm import tqdm
 
+# Numba is optional: when present the per-turn sampling and relabeling glue
+# runs as compiled single-pass loops, otherwise the NumPy paths below are used
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 from Arena import Arena
-from MCTS import MCTS
+from MCTS import MCTS, RootParallelMCTS, InferenceCache
 
 log = logging.getLogger(__name__)
 
+# Per-process state for the self-play workers. Each worker owns its own game,
+# network replica and args so episodes can run fully independently.
+_worker = {}
+
+# Initial example capacity of one episode's arrays; games are draw-capped at
+# 40 moves so this is never outgrown in practice (the arrays double if it is)
+MAX_EPISODE_EXAMPLES = 64
+
+# Write buffer for example files: large enough to keep syscalls rare, small
+# enough not to matter next to the examples themselves
+EXAMPLES_BUFFER_SIZE = 1 << 20
+
+
+def _writePickleFile(filename, examples):
+    # Protocol 5 emits each NumPy buffer as one contiguous block, and
+    # streaming the Pickler through a 1 MiB file buffer avoids holding a
+    # second full copy of the serialized history in memory. Publish
+    # atomically so a crash mid-save cannot corrupt the previous file
+    tmpname = filename + ".tmp"
+    with open(tmpname, "wb", buffering=EXAMPLES_BUFFER_SIZE) as f:
+        Pickler(f, protocol=HIGHEST_PROTOCOL).dump(examples)
+        f.flush()
+        os.fsync(f.fileno())  # the rename below must never beat the data to disk
+    os.replace(tmpname, filename)
+
+
+def _writeNpzFile(filename, arrays):
+    # Writing to an already-open file keeps np.savez_compressed from tacking
+    # another .npz onto the temp name; publish atomically like the pickle path
+    tmpname = filename + ".tmp"
+    with open(tmpname, "wb") as f:
+        np.savez_compressed(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpname, filename)
+
+
+def _writeTensorFile(filename, blob):
+    # torch.save buffers through its own zipfile writer, so flush and fsync
+    # before the rename like the pickle and npz paths
+    import torch
+    tmpname = filename + ".tmp"
+    with open(tmpname, "wb") as f:
+        torch.save(blob, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpname, filename)
+
+
+def _backupCopy(src, dstFolder):
+    """
+    Copies a published file into the backup folder. On Linux,
+    os.copy_file_range moves the bytes inside the kernel (and can reflink on
+    supporting filesystems) instead of bouncing them through user space; a
+    4 MiB-buffered copyfileobj covers everything else.
+    """
+    dst = os.path.join(dstFolder, os.path.basename(src))
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if hasattr(os, 'copy_file_range'):
+            try:
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                if offset >= size:
+                    return
+            except OSError:
+                # Not supported across these filesystems; restart below
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, 4 * 1024 * 1024)
+
+
+def _writerLoop(queue, driveFolder):
+    """
+    Entry point of the background writer process: serializes and atomically
+    publishes example files (mirroring them to the backup folder, if any) so
+    the training loop never stalls on compression or disk writes. A None item
+    shuts the writer down.
+    """
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        kind, filename, payload = item
+        try:
+            if kind == 'remove':
+                # Queued behind any pending publish of the same shard, so the
+                # delete can never run before the file exists
+                if os.path.isfile(filename):
+                    os.remove(filename)
+                continue
+            if kind == 'npz':
+                _writeNpzFile(filename, payload)
+            elif kind == 'tensor':
+                _writeTensorFile(filename, payload)
+            else:
+                _writePickleFile(filename, payload)
+            if driveFolder:
+                os.makedirs(driveFolder, exist_ok=True)
+                _backupCopy(filename, driveFolder)
+        except Exception:
+            log.exception("Background write of %s failed", filename)
+
+
+class ExampleArrays():
+    """
+    Examples packed as three parallel arrays (boards, pis, values) instead of
+    a list of per-example tuples, avoiding tens of bytes of Python object
+    overhead per example. len() and integer indexing still yield (board, pi,
+    v) rows, so NNet.train keeps sampling examples unchanged.
+    """
+    def __init__(self, boards, pis, values):
+        self.boards = boards
+        self.pis = pis
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.boards[i], self.pis[i], self.values[i]
+
+    @classmethod
+    def fromEpisodes(cls, episodes):
+        """Packs a list of per-episode (boards, pis, values) triples."""
+        return cls(np.concatenate([e[0] for e in episodes]),
+                   np.concatenate([e[1] for e in episodes]),
+                   np.concatenate([e[2] for e in episodes]))
+
+    @classmethod
+    def fromExamples(cls, examples):
+        """Packs a legacy list of (board, pi, v) example tuples."""
+        boards, pis, values = zip(*examples)
+        return cls(np.stack(boards), np.stack(pis), np.asarray(values, dtype=np.float32))
+
+    @classmethod
+    def concatenate(cls, parts):
+        """
+        Merges several iterations' buffers (coercing legacy example lists
+        loaded from old files) into one packed buffer with a single copy
+        per array.
+        """
+        parts = [p if isinstance(p, cls) else cls.fromExamples(p) for p in parts]
+        return cls.fromEpisodes([(p.boards, p.pis, p.values) for p in parts])
+
+    def shuffled(self, perm):
+        """The buffer reordered by an index permutation."""
+        return ExampleArrays(self.boards[perm], self.pis[perm], self.values[perm])
+
+    def tail(self, n):
+        """The newest n examples (the whole buffer if it is smaller)."""
+        return ExampleArrays(self.boards[-n:], self.pis[-n:], self.values[-n:])
+
+
+def _attachExampleBuffers(shmSpec):
+    """
+    Maps the shared-memory example arrays described by shmSpec (name, shape,
+    dtype per buffer). The SharedMemory handles are returned alongside the
+    arrays so they stay alive for the life of the worker.
+    """
+    blocks = []
+    arrays = {}
+    for key, (name, shape, dtype) in shmSpec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return blocks, arrays
+
+
+def _selfPlayWorkerInit(game, nnet_class, args, folder, filename, rankCounter, weightsVersion,
+                        shmSpec=None, shmCursor=None):
+    """
+    Initializer run once in every self-play worker process. Builds a fresh
+    network replica and loads the weights saved by the parent for this
+    iteration. With numSelfPlayGPUs > 1 each worker pins itself to one GPU
+    (round-robin by worker rank) before the replica is built, so self-play
+    scales across all available devices.
+    """
+    with rankCounter.get_lock():
+        rank = rankCounter.value
+        rankCounter.value += 1
+
+    if args.numSelfPlayGPUs > 1:
+        # The spawned child has already re-imported torch by the time this
+        # runs, so the device is selected via torch rather than
+        # CUDA_VISIBLE_DEVICES (which is only read at CUDA initialization)
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.set_device(rank % args.numSelfPlayGPUs)
+
+    nnet = nnet_class(game)
+    nnet.load_checkpoint(folder=folder, filename=filename)
+    _worker['game'] = game
+    _worker['nnet'] = nnet
+    _worker['args'] = args
+    _worker['checkpoint'] = (folder, filename)
+    # The pool outlives one iteration; the parent bumps weightsVersion after
+    # each new snapshot so workers know to reload before their next episode
+    _worker['weightsVersion'] = weightsVersion
+    _worker['loadedVersion'] = weightsVersion.value
+    # Weights are fixed for the lifetime of the pool (one iteration), so a
+    # per-worker cache stays valid across the episodes this worker plays
+    _worker['cache'] = InferenceCache(args.inferenceCacheSize) if args.inferenceCacheSize > 0 else None
+    _worker['mcts'] = _makeSearch(game, nnet, args, inferenceCache=_worker['cache'])
+
+    if shmSpec is not None:
+        _worker['shmBlocks'], _worker['shmArrays'] = _attachExampleBuffers(shmSpec)
+        _worker['shmCursor'] = shmCursor
+    else:
+        _worker['shmArrays'] = None
+
+
+def _runSelfPlayEpisode(seed):
+    """
+    Plays a single self-play episode inside a worker process. Each episode gets
+    a distinct seed so parallel workers don't produce duplicate games.
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+    game, nnet, args = _worker['game'], _worker['nnet'], _worker['args']
+
+    version = _worker['weightsVersion'].value
+    if version != _worker['loadedVersion']:
+        # A new iteration started since this worker's last episode
+        folder, filename = _worker['checkpoint']
+        nnet.load_checkpoint(folder=folder, filename=filename)
+        if _worker['cache'] is not None:
+            _worker['cache'].clear()
+        _worker['loadedVersion'] = version
+
+    mcts = _worker['mcts']
+    mcts.reset()  # fresh search tree per episode, same instance
+    boards, pis, values = _executeEpisode(game, mcts, args, rng=np.random.default_rng(seed))
+
+    arrays = _worker['shmArrays']
+    if arrays is None:
+        return ('arrays', boards, pis, values)
+
+    # Copy the episode into reserved slots of the shared buffers and hand the
+    # parent just the slot range, so the examples themselves are never pickled
+    cursor = _worker['shmCursor']
+    n = len(values)
+    with cursor.get_lock():
+        start = cursor.value
+        if start + n > len(arrays['values']):
+            log.warning("Shared example buffer full, returning episode via pickle")
+            return ('arrays', boards, pis, values)
+        cursor.value = start + n
+
+    arrays['boards'][start:start + n] = boards
+    arrays['pis'][start:start + n] = pis
+    arrays['values'][start:start + n] = values
+    return ('shm', start, n)
+
+
+def _arenaWorkerInit(game, nnet_class, args, folder, pFilename, nFilename):
+    """
+    Initializer run once in every arena worker process. Builds replicas of the
+    previous and the new network from the checkpoints saved by the parent.
+    """
+    pnet = nnet_class(game)
+    pnet.load_checkpoint(folder=folder, filename=pFilename)
+    nnet = nnet_class(game)
+    nnet.load_checkpoint(folder=folder, filename=nFilename)
+    _worker['game'] = game
+    _worker['args'] = args
+    _worker['pnet'] = pnet
+    _worker['nnet'] = nnet
+
+
+def _runArenaPair(seed):
+    """
+    Plays one pair of arena games (each network starting once) inside a worker
+    process.
+
+    Returns:
+        (pwins, nwins, draws) for the pair.
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+    game, args = _worker['game'], _worker['args']
+    pmcts = MCTS(game, _worker['pnet'], args)
+    nmcts = MCTS(game, _worker['nnet'], args)
+    arena = Arena(pmcts.bestAction, nmcts.bestAction, game)
+    return arena.playGames(2)
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _cdfSampleJit(pi, u):
+        # Fused total + scan in one pass, with no temporary cdf array
+        total = 0.0
+        for i in range(pi.shape[0]):
+            total += pi[i]
+        target = u * total
+        acc = 0.0
+        for i in range(pi.shape[0]):
+            acc += pi[i]
+            if acc >= target:
+                return i
+        return pi.shape[0] - 1
+
+    @njit(cache=True)
+    def _episodeValuesJit(players, r, curPlayer):
+        values = np.empty(players.shape[0], dtype=np.float32)
+        for i in range(players.shape[0]):
+            # Branchless sign keeps the compiled loop free of data-dependent
+            # jumps, so it vectorizes cleanly
+            values[i] = r * (1.0 - 2.0 * (players[i] != curPlayer))
+        return values
+
+
+def _makeSearch(game, nnet, args, inferenceCache=None):
+    """
+    Builds the search driver used for self-play episodes: a single tree, or
+    numSearchRoots independent root-parallel trees whose visit counts are
+    merged per move.
+    """
+    if args.numSearchRoots > 1:
+        return RootParallelMCTS(game, nnet, args, args.numSearchRoots)
+    return MCTS(game, nnet, args, inferenceCache=inferenceCache)
+
+
+def _sampleAction(pi, rng):
+    """
+    Samples an action index from the policy vector with a cumulative-sum +
+    searchsorted draw, avoiding the validation and re-normalization that
+    np.random.choice performs on every call.
+    """
+    if HAS_NUMBA:
+        return int(_cdfSampleJit(pi, rng.random()))
+    cdf = np.cumsum(pi)
+    return int(np.searchsorted(cdf, rng.random() * cdf[-1]))
+
+
+def _executeEpisode(game, mcts, args, rng=None):
+    """
+    Executes one episode of self-play, starting with player 1. Module-level so
+    it is picklable and usable from worker processes; see Coach.executeEpisode
+    for the full contract.
+
+    Returns:
+        (boards, pis, values) as three parallel arrays, one row per example.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    # Preallocated structure-of-arrays storage, filled by index; the final
+    # outcome assignment then runs as one vectorized pass over `players`
+    boards = np.empty((MAX_EPISODE_EXAMPLES,) + game.getBoardSize(), dtype=np.int8)
+    # Policies are stored downcast; the trainer casts back to float32
+    pis = np.empty((MAX_EPISODE_EXAMPLES, game.getActionSize()), dtype=np.dtype(args.piDtype))
+    players = np.empty(MAX_EPISODE_EXAMPLES, dtype=np.int8)
+    k = 0
+    board = game.getInitBoard()
+    curPlayer = 1
+    episodeStep = 0
+    # Mastergoal's only symmetry is the identity (play is goal-directed), so
+    # when a probe confirms that, the per-turn getSymmetries call is skipped
+    probe = game.getSymmetries(board, np.zeros(game.getActionSize()))
+    trivialSym = len(probe) == 1 and probe[0][0] is board
+    # Hoist the per-turn attribute lookups (dict lookups on args, method
+    # binds on game/mcts) into locals; the loop body only does LOAD_FASTs
+    verbose = args.verbose
+    tempThreshold = args.tempThreshold
+    getCanonicalForm = game.getCanonicalForm
+    getSymmetries = game.getSymmetries
+    getNextState = game.getNextState
+    getGameEnded = game.getGameEnded
+    getActionProb = mcts.getActionProb
+
+    while True:
+        episodeStep += 1
+
+        canonicalBoard = getCanonicalForm(board, curPlayer)
+
+        # Even throttled logging costs formatting and I/O under the GIL on
+        # every worker, so the hot loop only reports when playing verbosely
+        if verbose:
+            canonicalBoard.display()
+            if episodeStep % 10 == 0:
+                log.info("Turn #%d", episodeStep)
+
+        temp = int(episodeStep < tempThreshold)
+
+        pi = getActionProb(canonicalBoard, temp=temp)
+        sym = [(canonicalBoard, pi)] if trivialSym else getSymmetries(canonicalBoard, pi)
+        for b, p in sym:
+            if k == len(players):
+                # Doubling keeps the (unlikely) growth cost amortized
+                boards = np.concatenate([boards, np.empty_like(boards)])
+                pis = np.concatenate([pis, np.empty_like(pis)])
+                players = np.concatenate([players, np.empty_like(players)])
+            boards[k] = b.encode()
+            pis[k] = p
+            players[k] = curPlayer
+            k += 1
+
+        # A temp=0 policy is one-hot, so the argmax shortcut skips sampling
+        action = int(np.argmax(pi)) if temp == 0 else _sampleAction(pi, rng)
+        board, curPlayer = getNextState(board, curPlayer, action, verbose=verbose)
+
+        r = getGameEnded(board, curPlayer, verbose=verbose)
+
+        if r != 0:
+            log.debug("The outcome - r value: %s", r)
+            return boards[:k], pis[:k], _episodeValues(players[:k], r, curPlayer)
+
+
+def _episodeValues(players, r, curPlayer):
+    """
+    Computes the value target of every example in one vectorized pass: r for
+    the examples recorded by the player the result refers to, -r for the rest.
+    """
+    players = np.asarray(players, dtype=np.int8)
+    if HAS_NUMBA:
+        return _episodeValuesJit(players, float(r), curPlayer)
+    return np.where(players == curPlayer, r, -r).astype(np.float32)
+
 
 class Coach():
     """
@@ -24,10 +459,29 @@ class Coach():
     def __init__(self, game, nnet, args):
         self.game = game
         self.nnet = nnet
-        self.pnet = self.nnet.__class__(self.game)  # the competitor network
         self.args = args
-        self.mcts = MCTS(self.game, self.nnet, self.args)
-        self.trainExamplesHistory = []  # history of examples from args.numItersForTrainExamplesHistory latest iterations
+        self.inferenceCache = InferenceCache(self.args.inferenceCacheSize) if self.args.inferenceCacheSize > 0 else None
+        self._piDtype = np.dtype(self.args.piDtype)  # in-memory dtype for stored policies
+        # Probe whether getSymmetries is the identity (it is for Mastergoal),
+        # in which case the batched driver skips the per-turn call
+        initBoard = game.getInitBoard()
+        probe = game.getSymmetries(initBoard, np.zeros(game.getActionSize()))
+        self._trivialSymmetries = len(probe) == 1 and probe[0][0] is initBoard
+        self.rng = np.random.default_rng()  # action-sampling generator, avoids the global RNG lock
+        self._trainPool = None  # background executor for pipelined training
+        self._ioPool = None  # background executor for backup copies (driveBackupFolder)
+        self._writerProcess = None  # background process for example writes (asyncExampleWrites)
+        self._writeQueue = None
+        self._pendingTrain = None  # (future, replica, iteration) of a training run still in flight
+        self._selfPlayPool = None  # persistent worker pool, created on first parallel self-play
+        self._weightsVersion = None  # shared counter telling workers to reload the snapshot
+        self._shmBlocks = {}  # shared-memory example buffers (sharedMemoryExamples)
+        self._shmArrays = None
+        self._shmCursor = None
+        self.mcts = _makeSearch(self.game, self.nnet, self.args, inferenceCache=self.inferenceCache)
+        # history of examples from args.numItersForTrainExamplesHistory latest iterations;
+        # the deque evicts the oldest iteration automatically in O(1)
+        self.trainExamplesHistory = deque(maxlen=self.args.numItersForTrainExamplesHistory)
         self.skipFirstSelfPlay = False  # can be overriden in loadTrainExamples()
 
     def executeEpisode(self):
@@ -42,44 +496,243 @@ class Coach():
         uses temp=0.
 
         Returns:
-            trainExamples: a list of examples of the form (canonicalBoard, currPlayer, pi,v)
-                           pi is the MCTS informed policy vector, v is +1 if
-                           the player eventually won the game, else -1.
+            (boards, pis, values) as three parallel arrays, one row per
+            example: pi is the MCTS informed policy vector, v is +1 if the
+            player eventually won the game, else -1.
         """
-        trainExamples = []
-        board = self.game.getInitBoard()
-        self.curPlayer = 1
-        episodeStep = 0
+        return _executeEpisode(self.game, self.mcts, self.args, rng=self.rng)
 
-        while True:
-            episodeStep += 1
+    def runParallelSelfPlay(self):
+        """
+        Distributes the numEps self-play episodes of one iteration across a
+        pool of worker processes. The current weights are saved once and every
+        worker loads them into its own network replica at startup.
+
+        Returns:
+            a list with one (boards, pis, values) triple per episode played.
+        """
+        folder = self.args.checkpoint
+        self.nnet.save_checkpoint(folder=folder, filename='selfplay.pth.tar')
 
-            canonicalBoard = self.game.getCanonicalForm(board, self.curPlayer)
+        if self._selfPlayPool is None:
+            # The pool is created once and reused across iterations; spawning
+            # workers and rebuilding their replicas per iteration is expensive
+            ctx = multiprocessing.get_context('spawn')
+            rankCounter = ctx.Value('i', 0)
+            self._weightsVersion = ctx.Value('i', 0)
 
-            print(f"Turn #{episodeStep}")
-            if self.args.verbose:
-                canonicalBoard.display()
-            if episodeStep % 10 == 0:
-                log.info(f"Turn #{episodeStep}")
+            shmSpec = None
+            if self.args.sharedMemoryExamples:
+                self._shmBlocks, shmSpec, self._shmArrays = self._createExampleBuffers()
+                self._shmCursor = ctx.Value('i', 0)
 
-            temp = int(episodeStep < self.args.tempThreshold)
-            
+            initargs = (self.game, self.nnet.__class__, self.args, folder, 'selfplay.pth.tar',
+                        rankCounter, self._weightsVersion, shmSpec, self._shmCursor)
+            self._selfPlayPool = ctx.Pool(self.args.numSelfPlayWorkers,
+                                          initializer=_selfPlayWorkerInit, initargs=initargs)
+        else:
+            # Tell the idle workers that a fresh snapshot is waiting for them
+            with self._weightsVersion.get_lock():
+                self._weightsVersion.value += 1
 
-            pi = self.mcts.getActionProb(canonicalBoard, temp=temp)
-            #print(f"Action Probabilities: {pi}")
-            sym = self.game.getSymmetries(canonicalBoard, pi)
-            for b, p in sym:
-                trainExamples.append([b.encode(), self.curPlayer, p, None])
+        if self._shmCursor is not None:
+            with self._shmCursor.get_lock():
+                self._shmCursor.value = 0
 
-            action = np.random.choice(len(pi), p=pi)
-            #print(f"action selected in coach: {action}")
-            board, self.curPlayer = self.game.getNextState(board, self.curPlayer, action, verbose=self.args.verbose)
+        episodes = []
+        seeds = [int(time.time()) + i for i in range(self.args.numEps)]
+        shmArrays = self._shmArrays
+        for result in tqdm(self._selfPlayPool.imap_unordered(_runSelfPlayEpisode, seeds),
+                           total=self.args.numEps, desc="Self Play"):
+            if result[0] == 'shm':
+                _, start, n = result
+                episodes.append((np.array(shmArrays['boards'][start:start + n]),
+                                 np.array(shmArrays['pis'][start:start + n]),
+                                 np.array(shmArrays['values'][start:start + n])))
+            else:
+                _, boards, pis, values = result
+                episodes.append((boards, pis, values))
+        return episodes
 
-            r = self.game.getGameEnded(board, self.curPlayer, verbose=self.args.verbose)
+    def _shutdownSelfPlayPool(self):
+        """
+        Tears down the persistent self-play pool and its shared-memory
+        buffers at the end of a training run.
+        """
+        if self._selfPlayPool is not None:
+            self._selfPlayPool.close()
+            self._selfPlayPool.join()
+            self._selfPlayPool = None
+        for shm in self._shmBlocks.values():
+            shm.close()
+            shm.unlink()
+        self._shmBlocks = {}
+        self._shmArrays = None
+        self._shmCursor = None
 
-            if r != 0:
-                log.info(f"The outcome - r value: {r}")
-                return [(x[0], x[2], r * ((-1) ** (x[1] != self.curPlayer))) for x in trainExamples]
+    def _createExampleBuffers(self):
+        """
+        Allocates the shared-memory arrays (boards, pis, values) sized for
+        maxlenOfQueue examples, through which self-play workers hand their
+        episodes back without pickling every example.
+        """
+        n = self.args.maxlenOfQueue
+        layout = {
+            'boards': ((n,) + self.game.getBoardSize(), np.int8),
+            'pis': ((n, self.game.getActionSize()), self._piDtype),
+            'values': ((n,), np.float32),
+        }
+        blocks = {}
+        shmSpec = {}
+        arrays = {}
+        for key, (shape, dtype) in layout.items():
+            dtype = np.dtype(dtype)
+            shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * dtype.itemsize)
+            blocks[key] = shm
+            shmSpec[key] = (shm.name, shape, dtype.str)
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return blocks, shmSpec, arrays
+
+    def executeEpisodesBatched(self):
+        """
+        Plays the numEps episodes of one iteration by advancing numParallelGames
+        games in lock-step. Each live game's MCTS descends to a leaf, the leaves
+        of all games are evaluated with a single predict_batch call, and the
+        results are scattered back, so the network sees one batched forward
+        pass per simulation step instead of one call per game. When a game ends
+        a new one is started in its slot until numEps have been played.
+
+        Returns:
+            a list with one (boards, pis, values) triple per episode played.
+        """
+        numEps = self.args.numEps
+        numMCTSSims = self.args.numMCTSSims
+        # With more than one in-flight simulation per tree, virtual loss keeps
+        # the parallel descents from all following the identical path
+        leavesPerGame = max(1, self.args.leavesPerGame)
+        useVirtualLoss = leavesPerGame > 1
+
+        episodes = []
+        slots = [self._newGameSlot() for _ in range(min(self.args.numParallelGames, numEps))]
+        episodesStarted = len(slots)
+        episodesDone = 0
+
+        pbar = tqdm(total=numEps, desc="Self Play")
+        while episodesDone < numEps:
+            # Advance every live game by up to leavesPerGame simulations,
+            # pausing at leaves that need a network evaluation
+            pendingSlots = []
+            pendingHandles = []
+            leaves = []
+            leafKeys = []
+            for slot in slots:
+                if slot is None:
+                    continue
+                issued = 0
+                while issued < leavesPerGame and slot['simsDone'] + issued < numMCTSSims:
+                    leaf = slot['mcts'].startSearch(slot['canonical'], virtualLoss=useVirtualLoss)
+                    if leaf is None:
+                        slot['simsDone'] += 1
+                        continue
+                    handle = slot['mcts'].popPending()
+                    if self.inferenceCache is not None:
+                        key = leaf.encode().tobytes()
+                        cached = self.inferenceCache.get(key)
+                        if cached is not None:
+                            slot['mcts'].finishSearch(*cached, pending=handle)
+                            slot['simsDone'] += 1
+                            continue
+                        leafKeys.append(key)
+                    pendingSlots.append(slot)
+                    pendingHandles.append(handle)
+                    leaves.append(leaf)
+                    issued += 1
+
+            # One batched forward pass services every paused tree
+            if leaves:
+                pis, vs = self.nnet.predict_batch(leaves)
+                for k, slot in enumerate(pendingSlots):
+                    if self.inferenceCache is not None:
+                        self.inferenceCache.put(leafKeys[k], pis[k], vs[k])
+                    slot['mcts'].finishSearch(pis[k], vs[k], pending=pendingHandles[k])
+                    slot['simsDone'] += 1
+
+            # Play a move in every game whose simulations are complete
+            for idx, slot in enumerate(slots):
+                if slot is None or slot['simsDone'] < numMCTSSims:
+                    continue
+                self._playBatchedMove(slot)
+                if slot['result'] is not None:
+                    episodes.append(slot['result'])
+                    episodesDone += 1
+                    pbar.update(1)
+                    if episodesStarted < numEps:
+                        slots[idx] = self._newGameSlot()
+                        episodesStarted += 1
+                    else:
+                        slots[idx] = None
+        pbar.close()
+        return episodes
+
+    def _newGameSlot(self):
+        """
+        Creates the state of one concurrent self-play game: its board, a fresh
+        search tree and the examples collected so far.
+        """
+        board = self.game.getInitBoard()
+        return {
+            'board': board,
+            'canonical': self.game.getCanonicalForm(board, 1),
+            'curPlayer': 1,
+            'episodeStep': 1,
+            'mcts': MCTS(self.game, self.nnet, self.args, inferenceCache=self.inferenceCache),
+            'boards': np.empty((MAX_EPISODE_EXAMPLES,) + self.game.getBoardSize(), dtype=np.int8),
+            'players': np.empty(MAX_EPISODE_EXAMPLES, dtype=np.int8),
+            'pis': np.empty((MAX_EPISODE_EXAMPLES, self.game.getActionSize()), dtype=self._piDtype),
+            'numExamples': 0,
+            'simsDone': 0,
+            'result': None,
+        }
+
+    def _playBatchedMove(self, slot):
+        """
+        Picks and applies a move for a game whose simulations for the current
+        turn are complete, recording the training examples. When the game ends
+        the relabeled examples are stored in slot['result'].
+        """
+        canonicalBoard = slot['canonical']
+        temp = int(slot['episodeStep'] < self.args.tempThreshold)
+
+        pi = slot['mcts'].getActionProbFromTree(canonicalBoard, temp=temp)
+        sym = [(canonicalBoard, pi)] if self._trivialSymmetries \
+            else self.game.getSymmetries(canonicalBoard, pi)
+        for b, p in sym:
+            k = slot['numExamples']
+            if k == len(slot['players']):
+                # Doubling keeps the (unlikely) growth cost amortized
+                for key in ('boards', 'pis', 'players'):
+                    slot[key] = np.concatenate([slot[key], np.empty_like(slot[key])])
+            slot['boards'][k] = b.encode()
+            slot['players'][k] = slot['curPlayer']
+            slot['pis'][k] = p
+            slot['numExamples'] = k + 1
+
+        # A temp=0 policy is one-hot, so the argmax shortcut skips sampling
+        action = int(np.argmax(pi)) if temp == 0 else _sampleAction(pi, self.rng)
+        board, curPlayer = self.game.getNextState(slot['board'], slot['curPlayer'], action,
+                                                  verbose=self.args.verbose)
+
+        r = self.game.getGameEnded(board, curPlayer, verbose=self.args.verbose)
+        if r != 0:
+            n = slot['numExamples']
+            slot['result'] = (slot['boards'][:n], slot['pis'][:n],
+                              _episodeValues(slot['players'][:n], r, curPlayer))
+        else:
+            slot['board'] = board
+            slot['curPlayer'] = curPlayer
+            slot['canonical'] = self.game.getCanonicalForm(board, curPlayer)
+            slot['episodeStep'] += 1
+            slot['simsDone'] = 0
 
     def learn(self):
         """
@@ -90,93 +743,462 @@ class Coach():
         only if it wins >= updateThreshold fraction of games.
         """
 
-        for i in range(self.args.starting_iteration, self.args.numIters + 1):
-            # bookkeeping
-            log.info(f'Starting Iter #{i} ...')
-            # examples of the iteration
-            if not self.skipFirstSelfPlay or i > 1:
-                iterationTrainExamples = deque([], maxlen=self.args.maxlenOfQueue)
-
-                for _ in tqdm(range(self.args.numEps), desc="Self Play"):
-                    self.mcts = MCTS(self.game, self.nnet, self.args)  # reset search tree
-                    episode_start_time = time.time()
-                    iterationTrainExamples += self.executeEpisode()
-                    episode_end_time = time.time()
-                    log.info(f"Game done in {round((episode_end_time - episode_start_time) * 1000)}ms")
-
-                # save the iteration examples to the history 
-                self.trainExamplesHistory.append(iterationTrainExamples)
-
-            if len(self.trainExamplesHistory) > self.args.numItersForTrainExamplesHistory:
-                log.warning(
-                    f"Removing the oldest entry in trainExamples. len(trainExamplesHistory) = {len(self.trainExamplesHistory)}")
-                self.trainExamplesHistory.pop(0)
-            # backup history to a file
-            # NB! the examples were collected using the model from the previous iteration, so (i-1)  
-            self.saveTrainExamples(i - 1)
-
-            # shuffle examples before training
-            trainExamples = []
-            for e in self.trainExamplesHistory:
-                trainExamples.extend(e)
-            shuffle(trainExamples)
-
-            # In AlphaGo Zero, the new player is accepted if it has a winrate of 55% against the previous version,
-            # but in AlphaZero, there is just a single network continuously updated
-            if self.args.arenaCompare:
-                # training new network, keeping a copy of the old one
-                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-                self.pnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-                pmcts = MCTS(self.game, self.pnet, self.args)
-
-                self.nnet.train(trainExamples)
-                nmcts = MCTS(self.game, self.nnet, self.args)
-
-                log.info('PITTING AGAINST PREVIOUS VERSION')
-                arena = Arena(lambda x: np.argmax(pmcts.getActionProb(x, temp=0)),
-                            lambda x: np.argmax(nmcts.getActionProb(x, temp=0)), self.game)
-                pwins, nwins, draws = arena.playGames(self.args.arenaCompare)
-
-                log.info('NEW/PREV WINS : %d / %d ; DRAWS : %d' % (nwins, pwins, draws))
-                if pwins + nwins == 0 or float(nwins) / (pwins + nwins) < self.args.updateThreshold:
-                    log.info('REJECTING NEW MODEL')
-                    self.nnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+        try:
+            for i in range(self.args.starting_iteration, self.args.numIters + 1):
+                # bookkeeping
+                log.info(f'Starting Iter #{i} ...')
+                # examples of the iteration
+                if not self.skipFirstSelfPlay or i > 1:
+                    if self.inferenceCache is not None:
+                        # Cached predictions belong to the previous iteration's weights
+                        self.inferenceCache.clear()
+
+                    selfPlayStart = time.time()
+                    if self.args.numSelfPlayWorkers > 1:
+                        episodes = self.runParallelSelfPlay()
+                    elif self.args.numParallelGames > 1:
+                        episodes = self.executeEpisodesBatched()
+                    else:
+                        episodes = []
+                        for _ in tqdm(range(self.args.numEps), desc="Self Play"):
+                            self.mcts.reset()  # fresh search tree, same instance
+                            episodes.append(self.executeEpisode())
+                    # One summary line per iteration instead of one per game
+                    selfPlayTime = time.time() - selfPlayStart
+                    log.info("Self-play: %d games in %.1fs (%.0fms/game)",
+                             len(episodes), selfPlayTime, selfPlayTime * 1000 / max(len(episodes), 1))
+
+                    # pack the iteration into contiguous arrays, keeping at most
+                    # the newest maxlenOfQueue examples like the old deque did
+                    iterationTrainExamples = ExampleArrays.fromEpisodes(episodes).tail(self.args.maxlenOfQueue)
+
+                    # save the iteration examples to the history
+                    self.trainExamplesHistory.append(iterationTrainExamples)
                 else:
-                    log.info('ACCEPTING NEW MODEL')
+                    iterationTrainExamples = None
+
+                # backup history to a file
+                # NB! the examples were collected using the model from the previous iteration, so (i-1)
+                # Only this iteration's examples are written every time; the full
+                # history dump is much larger, so it only happens periodically
+                if iterationTrainExamples:
+                    self.saveIterationExamples(i - 1, iterationTrainExamples)
+                # The older history entries never change, so with append-only
+                # examples the per-iteration files are authoritative and the
+                # legacy full-history dump is skipped entirely
+                if not self.args.appendOnlyExamples and i % self.args.fullHistorySaveEvery == 0:
+                    if self.args.exampleFormat == 'tensor':
+                        self.saveTrainExamplesTensor(i - 1)
+                    elif self.args.exampleFormat == 'npz':
+                        self.saveTrainExamplesNpz(i - 1)
+                    else:
+                        self.saveTrainExamples(i - 1)
+
+                # shuffle examples before training; the history is merged with one
+                # concatenation per array and shuffled through an index
+                # permutation instead of running Fisher-Yates over a Python list
+                merged = ExampleArrays.concatenate(self.trainExamplesHistory)
+                trainExamples = merged.shuffled(self.rng.permutation(len(merged)))
+
+                # In AlphaGo Zero, the new player is accepted if it has a winrate of 55% against the previous version,
+                # but in AlphaZero, there is just a single network continuously updated
+                if self.args.arenaCompare:
+                    # training new network, keeping a copy of the old one
+                    self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                    self.nnet.train(trainExamples)
+
+                    log.info('PITTING AGAINST PREVIOUS VERSION')
+                    if self.args.numArenaWorkers > 1:
+                        pwins, nwins, draws = self.runParallelArena()
+                    else:
+                        # The competitor network only lives for the arena phase, so
+                        # its memory is free for self-play and training otherwise
+                        pnet = self.nnet.__class__(self.game)
+                        pnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                        pmcts = MCTS(self.game, pnet, self.args)
+                        nmcts = MCTS(self.game, self.nnet, self.args)
+
+                        arena = Arena(pmcts.bestAction, nmcts.bestAction, self.game)
+                        pwins, nwins, draws = arena.playGames(self.args.arenaCompare)
+
+                        del pmcts, pnet
+                        import torch
+                        if torch.cuda.is_available():
+                            torch.cuda.empty_cache()
+
+                    log.info('NEW/PREV WINS : %d / %d ; DRAWS : %d' % (nwins, pwins, draws))
+                    if pwins + nwins == 0 or float(nwins) / (pwins + nwins) < self.args.updateThreshold:
+                        log.info('REJECTING NEW MODEL')
+                        self.nnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                    else:
+                        log.info('ACCEPTING NEW MODEL')
+                        self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(i))
+                        self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='best.pth.tar')
+                        self.backupToDrive(os.path.join(self.args.checkpoint, 'best.pth.tar'))
+                elif self.args.pipelineTraining:
+                    # Train in the background so the next iteration's self-play
+                    # starts immediately; the examples it produces lag the weight
+                    # update by at most one iteration. Training runs on its own
+                    # replica — sharing the live network would race self-play
+                    # predictions against the trainer's train()/eval() mode flips
+                    # and optimizer steps on the same modules
+                    self._resolvePendingTraining()
+                    self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                    trainNet = self.nnet.__class__(self.game)
+                    trainNet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                    if self._trainPool is None:
+                        self._trainPool = ThreadPoolExecutor(max_workers=1)
+                    self._pendingTrain = (self._trainPool.submit(trainNet.train, trainExamples), trainNet, i)
+                else:
+                    self.nnet.train(trainExamples)
+                    log.info(f'SAVING CHECKPOINT: {self.getCheckpointFile(i)}')
                     self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(i))
-                    self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='best.pth.tar')
-            else:
-                self.nnet.train(trainExamples)
-                log.info(f'SAVING CHECKPOINT: {self.getCheckpointFile(i)}')
-                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(i))
 
+            self._resolvePendingTraining()
+        finally:
+            # A crash or Ctrl-C must still drain the writer and stop the
+            # pools, or the queue feeder blocks interpreter exit forever
+            if self._trainPool is not None:
+                self._trainPool.shutdown(wait=True)
+                self._trainPool = None
+            if self._ioPool is not None:
+                self._ioPool.shutdown(wait=True)
+                self._ioPool = None
+            self._shutdownWriter()
+            self._shutdownSelfPlayPool()
+
+    def _resolvePendingTraining(self):
+        """
+        Waits for a pipelined training run to finish (if one is in flight),
+        saves the checkpoint that the synchronous path would have saved and
+        loads the trained weights into the live network.
+        """
+        if self._pendingTrain is None:
+            return
+        future, trainNet, iteration = self._pendingTrain
+        self._pendingTrain = None
+        future.result()
+        log.info('SAVING CHECKPOINT: %s', self.getCheckpointFile(iteration))
+        trainNet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(iteration))
+        self.nnet.load_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(iteration))
+
+        del trainNet
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+    def runParallelArena(self):
+        """
+        Distributes the arenaCompare games across a pool of worker processes.
+        Each worker loads its own replicas of the previous network (from
+        temp.pth.tar) and the freshly trained one, and plays pairs of games so
+        both networks start equally often.
+
+        Returns:
+            pwins, nwins, draws aggregated over all games.
+        """
+        folder = self.args.checkpoint
+        self.nnet.save_checkpoint(folder=folder, filename='arena.pth.tar')
+
+        numPairs = int(self.args.arenaCompare / 2)
+        pwins, nwins, draws = 0, 0, 0
+        seeds = [int(time.time()) + i for i in range(numPairs)]
+        ctx = multiprocessing.get_context('spawn')
+        initargs = (self.game, self.nnet.__class__, self.args, folder, 'temp.pth.tar', 'arena.pth.tar')
+        with ctx.Pool(self.args.numArenaWorkers, initializer=_arenaWorkerInit, initargs=initargs) as pool:
+            for p, n, d in tqdm(pool.imap_unordered(_runArenaPair, seeds),
+                                total=numPairs, desc="Arena.playGames"):
+                pwins += p
+                nwins += n
+                draws += d
+        return pwins, nwins, draws
 
     def getCheckpointFile(self, iteration):
         return 'checkpoint_' + str(iteration) + '.pth.tar'
 
+    def backupToDrive(self, filepath):
+        """
+        Mirrors a saved file into driveBackupFolder on a background thread.
+        Backup targets like Google Drive mounts take tens to hundreds of ms
+        per copy, so the training loop never waits on them; failures are
+        logged without interrupting training.
+        """
+        folder = self.args.driveBackupFolder
+        if not folder:
+            return
+        if self._ioPool is None:
+            self._ioPool = ThreadPoolExecutor(max_workers=2)
+            os.makedirs(folder, exist_ok=True)
+        self._ioPool.submit(_backupCopy, filepath, folder).add_done_callback(self._logBackupError)
+
+    @staticmethod
+    def _logBackupError(future):
+        err = future.exception()
+        if err is not None:
+            log.error("Backup copy failed: %s", err)
+
     def saveTrainExamples(self, iteration):
         folder = self.args.checkpoint
         if not os.path.exists(folder):
             os.makedirs(folder)
         filename = os.path.join(folder, self.getCheckpointFile(iteration) + ".examples")
         log.info(f"Saving examples to {filename}")
-        with open(filename, "wb+") as f:
-            Pickler(f).dump(self.trainExamplesHistory)
-        f.closed
+        # Snapshot the deque: the async writer pickles the payload lazily on
+        # the queue's feeder thread, and the next iteration's append would
+        # mutate the live history mid-pickle. The per-iteration buffers
+        # themselves are never mutated, so the shallow copy is enough
+        self._writeExamplesFile(filename, list(self.trainExamplesHistory))
+        if not self.args.asyncExampleWrites:
+            self.backupToDrive(filename)
+
+    def saveIterationExamples(self, iteration, examples):
+        """
+        Saves only the given iteration's examples to iter_{iteration}.examples
+        (or .examples.npz), so the per-iteration write cost stays proportional
+        to the new data instead of the whole history.
+        """
+        folder = self.args.checkpoint
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        if self.args.exampleFormat == 'npz':
+            filename = os.path.join(folder, f"iter_{iteration}.examples.npz")
+            log.info(f"Saving iteration examples to {filename}")
+            self._writeNpzExamplesFile(filename, {'boards': examples.boards, 'pis': examples.pis,
+                                                  'values': examples.values})
+        else:
+            filename = os.path.join(folder, f"iter_{iteration}.examples")
+            log.info(f"Saving iteration examples to {filename}")
+            self._writeExamplesFile(filename, examples)
+        if not self.args.asyncExampleWrites:
+            self.backupToDrive(filename)
+        self._pruneIterationExamples(iteration)
+
+    def _pruneIterationExamples(self, iteration):
+        """
+        Deletes per-iteration example files that have fallen out of the
+        numItersForTrainExamplesHistory window, so disk usage stays
+        proportional to the window instead of growing with the run. Prunes by
+        directory scan rather than probing indices downward: a shard the
+        async writer has not published yet would otherwise hide every older
+        stale file from the sweep.
+        """
+        stale = iteration - self.args.numItersForTrainExamplesHistory
+        if stale < 0:
+            return
+        for entry in os.scandir(self.args.checkpoint):
+            index = entry.name
+            for prefix, suffix in (('iter_', '.examples'), ('iter_', '.examples.npz')):
+                if index.startswith(prefix) and index.endswith(suffix):
+                    index = index[len(prefix):-len(suffix)]
+                    break
+            if not index.isdigit() or int(index) > stale:
+                continue
+            filename = os.path.join(self.args.checkpoint, entry.name)
+            if self.args.asyncExampleWrites:
+                # The writer deletes in queue order, after any pending
+                # publish of the same shard
+                self._enqueueWrite(('remove', filename, None))
+            else:
+                os.remove(filename)
+
+    def _writeExamplesFile(self, filename, examples):
+        if self.args.asyncExampleWrites:
+            self._enqueueWrite(('pickle', filename, examples))
+        else:
+            _writePickleFile(filename, examples)
+
+    def _writeNpzExamplesFile(self, filename, arrays):
+        if self.args.asyncExampleWrites:
+            self._enqueueWrite(('npz', filename, arrays))
+        else:
+            _writeNpzFile(filename, arrays)
+
+    def _writeTensorExamplesFile(self, filename, blob):
+        if self.args.asyncExampleWrites:
+            self._enqueueWrite(('tensor', filename, blob))
+        else:
+            _writeTensorFile(filename, blob)
+
+    def _enqueueWrite(self, item):
+        """
+        Hands a (kind, filename, payload) write order to the background writer
+        process, starting it on first use. The writer owns serialization,
+        atomic publishing and the backup mirror for example files, so the
+        training loop only pays the queue transfer.
+        """
+        if self._writerProcess is None:
+            ctx = multiprocessing.get_context('spawn')
+            self._writeQueue = ctx.Queue()
+            # Normal shutdown drains the queue through the None sentinel; if
+            # the process dies before that, exit anyway instead of blocking
+            # forever on the queue's feeder-thread join
+            self._writeQueue.cancel_join_thread()
+            self._writerProcess = ctx.Process(target=_writerLoop,
+                                              args=(self._writeQueue, self.args.driveBackupFolder),
+                                              daemon=True)
+            self._writerProcess.start()
+        self._writeQueue.put(item)
+
+    def _shutdownWriter(self):
+        """Flushes and stops the background writer process, if running."""
+        if self._writerProcess is not None:
+            self._writeQueue.put(None)
+            self._writerProcess.join()
+            self._writerProcess = None
+            self._writeQueue = None
+
+    def saveTrainExamplesTensor(self, iteration):
+        """
+        Saves the whole history as stacked tensors (boards, pis, values plus
+        per-iteration bounds) via torch.save, which serializes each tensor's
+        storage in one block instead of pickling every example object.
+        """
+        import torch
+        folder = self.args.checkpoint
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        filename = os.path.join(folder, self.getCheckpointFile(iteration) + ".examples.pt")
+        log.info(f"Saving examples to {filename}")
+
+        boards, pis, values, bounds = [], [], [], [0]
+        for iterationExamples in self.trainExamplesHistory:
+            if not isinstance(iterationExamples, ExampleArrays):
+                iterationExamples = ExampleArrays.fromExamples(iterationExamples)
+            boards.append(iterationExamples.boards)
+            pis.append(iterationExamples.pis)
+            values.append(iterationExamples.values)
+            bounds.append(bounds[-1] + len(iterationExamples))
+
+        blob = {
+            'boards': torch.from_numpy(np.concatenate(boards)) if boards else torch.empty(0),
+            'pis': torch.from_numpy(np.concatenate(pis)) if pis else torch.empty(0),
+            'values': torch.from_numpy(np.concatenate(values)) if values else torch.empty(0),
+            'bounds': torch.tensor(bounds, dtype=torch.long),
+        }
+        self._writeTensorExamplesFile(filename, blob)
+        if not self.args.asyncExampleWrites:
+            self.backupToDrive(filename)
+
+    def saveTrainExamplesNpz(self, iteration):
+        """
+        Saves the whole history as one compressed archive of packed arrays
+        (boards, pis, values plus per-iteration bounds). No per-example
+        pickle opcodes, and the int8 boards compress well.
+        """
+        folder = self.args.checkpoint
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        filename = os.path.join(folder, self.getCheckpointFile(iteration) + ".examples.npz")
+        log.info(f"Saving examples to {filename}")
+
+        merged = ExampleArrays.concatenate(self.trainExamplesHistory)
+        bounds = np.cumsum([0] + [len(part) for part in self.trainExamplesHistory])
+        self._writeNpzExamplesFile(filename, {'boards': merged.boards, 'pis': merged.pis,
+                                              'values': merged.values, 'bounds': bounds})
+        if not self.args.asyncExampleWrites:
+            self.backupToDrive(filename)
+
+    def loadTrainExamplesNpz(self, filename):
+        """
+        Rebuilds trainExamplesHistory from an archive written by
+        saveTrainExamplesNpz.
+        """
+        blob = np.load(filename)
+        boards, pis, values = blob['boards'], blob['pis'], blob['values']
+        bounds = blob['bounds'].tolist()
+
+        self.trainExamplesHistory = deque(maxlen=self.args.numItersForTrainExamplesHistory)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self.trainExamplesHistory.append(
+                ExampleArrays(boards[start:end], pis[start:end], values[start:end]))
+
+    def loadTrainExamplesTensor(self, filename):
+        """
+        Rebuilds trainExamplesHistory from a tensor blob written by
+        saveTrainExamplesTensor.
+        """
+        import torch
+        blob = torch.load(filename, map_location='cpu')
+        boards = blob['boards'].numpy()
+        pis = blob['pis'].numpy()
+        values = blob['values'].numpy()
+        bounds = blob['bounds'].tolist()
+
+        self.trainExamplesHistory = deque(maxlen=self.args.numItersForTrainExamplesHistory)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self.trainExamplesHistory.append(
+                ExampleArrays(boards[start:end], pis[start:end], values[start:end]))
 
     def loadTrainExamples(self):
         modelFile = os.path.join(self.args.load_folder_file[0], self.args.load_folder_file[1])
         examplesFile = modelFile + ".examples"
+        tensorFile = modelFile + ".examples.pt"
+        npzFile = modelFile + ".examples.npz"
+        if os.path.isfile(tensorFile):
+            log.info("File with trainExamples tensors found. Loading it...")
+            self.loadTrainExamplesTensor(tensorFile)
+            log.info('Loading done!')
+            self.skipFirstSelfPlay = True
+            return
+        if os.path.isfile(npzFile):
+            log.info("File with trainExamples arrays found. Loading it...")
+            self.loadTrainExamplesNpz(npzFile)
+            log.info('Loading done!')
+            self.skipFirstSelfPlay = True
+            return
         if not os.path.isfile(examplesFile):
             log.warning(f'File "{examplesFile}" with trainExamples not found!')
+            if self.loadIterationExamples(self.args.load_folder_file[0]):
+                log.info('Rebuilt trainExamples from per-iteration files!')
+                self.skipFirstSelfPlay = True
+                return
             r = input("Continue? [y|n]")
             if r != "y":
                 sys.exit()
         else:
             log.info("File with trainExamples found. Loading it...")
-            with open(examplesFile, "rb") as f:
-                self.trainExamplesHistory = Unpickler(f).load()
+            with open(examplesFile, "rb", buffering=EXAMPLES_BUFFER_SIZE) as f:
+                self.trainExamplesHistory = deque(Unpickler(f).load(),
+                                                  maxlen=self.args.numItersForTrainExamplesHistory)
             log.info('Loading done!')
 
             # examples based on the model were already collected (loaded)
-            self.skipFirstSelfPlay = True
\ No newline at end of file
+            self.skipFirstSelfPlay = True
+
+    def loadIterationExamples(self, folder):
+        """
+        Rebuilds trainExamplesHistory from the per-iteration iter_*.examples
+        files written by saveIterationExamples, keeping only the most recent
+        numItersForTrainExamplesHistory iterations.
+
+        Returns:
+            True if at least one iteration file was loaded.
+        """
+        if not os.path.isdir(folder):
+            return False
+        prefix = "iter_"
+        # scandir avoids allocating the full name list up front, and the
+        # iteration number is parsed once per file instead of per comparison
+        numbered = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith(prefix):
+                    continue
+                for suffix in (".examples.npz", ".examples"):
+                    if name.endswith(suffix):
+                        numbered.append((int(name[len(prefix):-len(suffix)]), name))
+                        break
+        numbered.sort()
+        names = [name for _, name in numbered[-self.args.numItersForTrainExamplesHistory:]]
+        for name in names:
+            path = os.path.join(folder, name)
+            if name.endswith(".npz"):
+                blob = np.load(path)
+                self.trainExamplesHistory.append(
+                    ExampleArrays(blob['boards'], blob['pis'], blob['values']))
+            else:
+                with open(path, "rb", buffering=EXAMPLES_BUFFER_SIZE) as f:
+                    self.trainExamplesHistory.append(Unpickler(f).load())
+        return len(names) > 0
\ No newline at end of file
@@ -2,12 +2,80 @@ import logging
 import math
 import numpy as np
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 EPS = 1e-8
+VIRTUAL_LOSS = 3  # Q penalty on edges with an in-flight (unresolved) simulation
 
 log = logging.getLogger(__name__)
 
+
+class InferenceCache():
+    """
+    Bounded LRU cache of neural-network predictions keyed on the encoded board
+    bytes. Transpositions reached again (within an episode or across parallel
+    games) reuse the stored (pi, v) instead of paying another forward pass.
+    Entries are only valid for one set of network weights, so the owner must
+    clear the cache whenever the network is retrained.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+        return entry
+
+    def put(self, key, pi, v):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        self.cache[key] = (pi, v)
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+    def clear(self):
+        self.cache.clear()
+
+def _probsFromCounts(counts, temp, rng):
+    """
+    Turns root visit counts into an action-probability vector: one-hot on the
+    most visited action for temp == 0 (ties broken at random), otherwise the
+    temperature-scaled visit distribution.
+    """
+    action_size = len(counts)
+
+    # Return a deterministic policy if temp == 0 (select most visited action)
+    if temp == 0:
+        max_count = np.max(counts)
+        if max_count > 0:
+            # Use NumPy to find indices of maximum values
+            bestAs = np.where(counts == max_count)[0]
+            bestA = rng.choice(bestAs)
+            probs = np.zeros(action_size)
+            probs[bestA] = 1
+            return probs
+        else:
+            # If no moves were visited, return uniform probabilities
+            return np.ones(action_size) / action_size
+
+    # Compute a probabilistic policy based on visit counts
+    if temp != 1:
+        counts = np.power(counts, 1.0 / temp)
+
+    # Handle the case when all counts are zero
+    counts_sum = np.sum(counts)
+    if counts_sum > 0:
+        probs = counts / counts_sum
+    else:
+        # Uniform distribution if no visits
+        probs = np.ones(action_size) / action_size
+
+    return probs
+
+
 class TreeLevel():
     """
     Holds all the nodes at a certain tree depth.
@@ -20,16 +88,31 @@ class TreeLevel():
         self.Ps = {}  # Stores the initial policy (action probabilities) from the neural network
         self.Es = {}  # Caches game-end status for state s
         self.Vs = {}  # Caches valid moves for state s
+        self.Vl = {}  # Counts in-flight simulations through edge (s, a) for virtual loss
 
 class MCTS():
     """
     Handles the Monte Carlo Tree Search (MCTS) process.
     """
-    def __init__(self, game, nnet, args):
+    def __init__(self, game, nnet, args, inferenceCache=None):
         self.game = game  # Game object providing game rules and state transitions
         self.nnet = nnet  # Neural network predicting policy and value for states
         self.args = args  # Arguments containing hyperparameters like cpuct and numMCTSSims
+        self.inferenceCache = inferenceCache  # Optional shared cache of network predictions
         self.nodes = defaultdict(TreeLevel)  # Tree structure storing information for each depth
+        self._pending = None  # Descent paused at a leaf awaiting its network evaluation
+        self.rng = np.random.default_rng()  # tie-breaking generator, avoids the global RNG lock
+
+    def reset(self):
+        """
+        Clears the search tree for a new episode so one MCTS instance can be
+        reused across games instead of being rebuilt. Within a game no reset
+        is needed: nodes are keyed by depth and state, so the played line's
+        subtree keeps its statistics from move to move and _visitCounts
+        prunes the depths above the new root as the game advances.
+        """
+        self.nodes.clear()
+        self._pending = None
 
     def getActionProb(self, canonicalBoard, temp=1):
         """
@@ -46,82 +129,216 @@ class MCTS():
         for i in range(self.args.numMCTSSims):
             self.search(canonicalBoard)
 
+        return self.getActionProbFromTree(canonicalBoard, temp=temp)
+
+    def getActionProbFromTree(self, canonicalBoard, temp=1):
+        """
+        Computes the action probabilities from the visit counts already stored
+        in the tree, without running any additional simulations. Used by the
+        batched self-play driver which issues the simulations itself.
+
+        Args:
+            canonicalBoard: The current game state in its canonical form.
+            temp: Temperature parameter controlling exploration.
+
+        Returns:
+            probs: A vector where each entry represents the probability of selecting an action.
+        """
+        counts = self._visitCounts(canonicalBoard)
+        return _probsFromCounts(counts, temp, self.rng)
+
+    def bestAction(self, canonicalBoard):
+        """
+        Runs the configured simulations and returns the most visited action as
+        an integer directly, skipping the temp=0 policy-vector materialization
+        that callers would immediately reduce with np.argmax.
+
+        Args:
+            canonicalBoard: The current game state in its canonical form.
+
+        Returns:
+            The index of the most visited action (ties broken at random).
+        """
+        for i in range(self.args.numMCTSSims):
+            self.search(canonicalBoard)
+
+        counts = self._visitCounts(canonicalBoard)
+        bestAs = np.where(counts == np.max(counts))[0]
+        return int(self.rng.choice(bestAs))
+
+    def _visitCounts(self, canonicalBoard):
+        """
+        Collects the root visit counts for every action into an array and
+        discards the tree level above the root, which can no longer be reached.
+        """
         # Serialize the board state
-        s = self.game.stringRepresentation(canonicalBoard)  
+        s = self.game.stringRepresentation(canonicalBoard)
         # Track the current depth of the tree
-        depth = canonicalBoard.move_count  
-        
+        depth = canonicalBoard.move_count
+
         # Get action size once
         action_size = self.game.getActionSize()
-        
+
         # Create a NumPy array to store counts for vectorization
         counts = np.zeros(action_size, dtype=np.float32)
-        
-        # Use vectorized operations where possible
+
         for a in range(action_size):
             if (s, a) in self.nodes[depth].Nsa:
                 counts[a] = self.nodes[depth].Nsa[(s, a)]
-        
+
         # Discard the previous depth's nodes to save memory
         if (depth - 1) in self.nodes:
             del self.nodes[depth - 1]
 
-        # Return a deterministic policy if temp == 0 (select most visited action)
-        if temp == 0:
-            max_count = np.max(counts)
-            if max_count > 0:
-                # Use NumPy to find indices of maximum values
-                bestAs = np.where(counts == max_count)[0]
-                bestA = np.random.choice(bestAs)
-                probs = np.zeros(action_size)
-                probs[bestA] = 1
-                return probs
-            else:
-                # If no moves were visited, return uniform probabilities
-                return np.ones(action_size) / action_size
+        return counts
 
-        # Compute a probabilistic policy based on visit counts
-        if temp != 1:
-            counts = np.power(counts, 1.0 / temp)
-        
-        # Handle the case when all counts are zero
-        counts_sum = np.sum(counts)
-        if counts_sum > 0:
-            probs = counts / counts_sum
-        else:
-            # Uniform distribution if no visits
-            probs = np.ones(action_size) / action_size
+    def search(self, canonicalBoard):
+        """
+        Performs one iteration of MCTS, exploring the tree until a leaf node is
+        found, evaluating it with the neural network and backing up the result.
 
-        return probs
+        Args:
+            canonicalBoard: The current game state in canonical form.
+        """
+        leaf = self.startSearch(canonicalBoard)
+        if leaf is not None:
+            if self.inferenceCache is not None:
+                key = leaf.encode().tobytes()
+                cached = self.inferenceCache.get(key)
+                if cached is not None:
+                    pi, v = cached
+                else:
+                    # Query the neural network for policy (P) and value (v)
+                    pi, v = self.nnet.predict(leaf)
+                    self.inferenceCache.put(key, pi, v)
+            else:
+                pi, v = self.nnet.predict(leaf)
+            self.finishSearch(pi, v)
 
-    def search(self, canonicalBoard):
+    def startSearch(self, canonicalBoard, virtualLoss=False):
         """
-        Performs one iteration of MCTS, recursively exploring the tree until a leaf node is found.
+        Descends the tree from the given root until a leaf is reached. Terminal
+        states and their values are backed up immediately; if the leaf needs a
+        neural-network evaluation, the descent path is kept pending and the
+        leaf board is returned so the caller can evaluate it (possibly batched
+        with leaves from other trees) and complete it via finishSearch.
 
         Args:
             canonicalBoard: The current game state in canonical form.
+            virtualLoss: If True, edges on the descent path are penalized with
+                         a virtual loss until the simulation is resolved, so
+                         several simulations can be in flight on the same tree
+                         without all following the identical path.
 
         Returns:
-            v: The negative value of the board state as evaluated by the neural network.
+            The leaf board awaiting a neural-network evaluation, or None if
+            this simulation ended on a terminal state and was fully backed up.
+        """
+        path = []  # Sequence of (depth, s, a) edges taken during the descent
+        board = canonicalBoard
+
+        while True:
+            s = self.game.stringRepresentation(board)  # Serialize the board state
+            depth = board.move_count  # Track tree depth based on move count
+
+            # Check if the game has ended for this state
+            if s not in self.nodes[depth].Es:
+                self.nodes[depth].Es[s] = self.game.getGameEnded(board, 1)
+            if self.nodes[depth].Es[s] != 0:
+                # Back up the game's result from this terminal state
+                if virtualLoss:
+                    self._revertVirtualLoss(path)
+                self._backup(path, self.nodes[depth].Es[s])
+                return None
+
+            # Pause at a leaf node that still needs a network evaluation
+            if s not in self.nodes[depth].Ps:
+                self._pending = (path, board, s, depth, virtualLoss)
+                return board
+
+            # Vectorized UCB calculation
+            valids = self.nodes[depth].Vs[s]  # Retrieve valid moves
+            action_size = self.game.getActionSize()
+
+            # Create arrays for UCB calculation
+            ucb_values = np.zeros(action_size)
+
+            # The policy values for all actions at state s
+            policy = self.nodes[depth].Ps[s]
+
+            # The exploration term constant
+            cpuct = self.args.cpuct
+
+            # Calculate the exploration base (sqrt of total visits)
+            sqrt_total_visits = math.sqrt(self.nodes[depth].Ns[s])
+
+            for a in range(action_size):
+                if valids[a]:
+                    vl = self.nodes[depth].Vl.get((s, a), 0)
+                    if (s, a) in self.nodes[depth].Qsa:
+                        # Exploitation + exploration for visited nodes
+                        q_value = self.nodes[depth].Qsa[(s, a)]
+                        n_visits = self.nodes[depth].Nsa[(s, a)]
+                        if vl:
+                            # Treat in-flight simulations as provisional losses
+                            q_value = (n_visits * q_value - vl * VIRTUAL_LOSS) / (n_visits + vl)
+                            n_visits += vl
+                        ucb_values[a] = q_value + cpuct * policy[a] * sqrt_total_visits / (1 + n_visits)
+                    elif vl:
+                        ucb_values[a] = -VIRTUAL_LOSS + cpuct * policy[a] * sqrt_total_visits / (1 + vl)
+                    else:
+                        # Pure exploration for unvisited nodes
+                        ucb_values[a] = cpuct * policy[a] * sqrt_total_visits
+                else:
+                    # Invalid moves get -infinity
+                    ucb_values[a] = -float('inf')
+
+            # Find the best action (argmax)
+            a = np.argmax(ucb_values)
+
+            # Execute the chosen action and keep descending
+            path.append((depth, s, a))
+            if virtualLoss:
+                self.nodes[depth].Vl[(s, a)] = self.nodes[depth].Vl.get((s, a), 0) + 1
+            next_s, next_player = self.game.getNextState(board, 1, a)  # Get next state and player
+            board = self.game.getCanonicalForm(next_s, next_player)  # Convert to canonical form
+
+    def popPending(self):
+        """
+        Detaches the descent paused by the last startSearch call so the caller
+        can start further simulations on this tree before resolving it. The
+        returned handle is later passed back through finishSearch.
+        """
+        pending = self._pending
+        self._pending = None
+        return pending
+
+    def finishSearch(self, pi, v, pending=None):
+        """
+        Completes a simulation paused by startSearch: expands the pending leaf
+        with the network's policy and backs the value up along the stored path.
+
+        Args:
+            pi: Policy vector predicted by the neural network for the leaf.
+            v: Value predicted for the leaf, from the leaf player's perspective.
+            pending: Descent handle from popPending; defaults to the one left
+                     by the most recent startSearch call.
         """
-        s = self.game.stringRepresentation(canonicalBoard)  # Serialize the board state
-        depth = canonicalBoard.move_count  # Track tree depth based on move count
+        if pending is None:
+            pending = self._pending
+            self._pending = None
+        path, board, s, depth, virtualLoss = pending
 
-        # Check if the game has ended for this state
-        if s not in self.nodes[depth].Es:
-            self.nodes[depth].Es[s] = self.game.getGameEnded(canonicalBoard, 1)
-        if self.nodes[depth].Es[s] != 0:
-            # Return the game's result if it's a terminal state
-            return -self.nodes[depth].Es[s]
+        if virtualLoss:
+            self._revertVirtualLoss(path)
 
-        # Expand the tree at a leaf node
+        # Two in-flight simulations can reach the same leaf; only the first
+        # expands it, the second just backs its value up
         if s not in self.nodes[depth].Ps:
-            # Query the neural network for policy (P) and value (v)
-            self.nodes[depth].Ps[s], v = self.nnet.predict(canonicalBoard)
-            valids = self.game.getValidMoves(canonicalBoard, 1)  # Get valid moves for the state
-            
+            valids = self.game.getValidMoves(board, 1)  # Get valid moves for the state
+
             # Vectorized masking of invalid moves
-            self.nodes[depth].Ps[s] = self.nodes[depth].Ps[s] * valids  # Mask invalid moves
+            self.nodes[depth].Ps[s] = pi * valids  # Mask invalid moves
 
             sum_Ps_s = np.sum(self.nodes[depth].Ps[s])
             if sum_Ps_s > 0:
@@ -133,59 +350,77 @@ class MCTS():
 
             self.nodes[depth].Vs[s] = valids  # Cache valid moves
             self.nodes[depth].Ns[s] = 0  # Initialize visit count for the state
-            return -v
 
-        # Vectorized UCB calculation
-        valids = self.nodes[depth].Vs[s]  # Retrieve valid moves
-        action_size = self.game.getActionSize()
-        
-        # Create arrays for UCB calculation
-        ucb_values = np.zeros(action_size)
-        
-        # The policy values for all actions at state s
-        policy = self.nodes[depth].Ps[s]
-        
-        # The exploration term constant
-        cpuct = self.args.cpuct
-        
-        # Calculate the exploration base (sqrt of total visits)
-        sqrt_total_visits = math.sqrt(self.nodes[depth].Ns[s])
-        
-        for a in range(action_size):
-            if valids[a]:
-                if (s, a) in self.nodes[depth].Qsa:
-                    # Exploitation + exploration for visited nodes
-                    q_value = self.nodes[depth].Qsa[(s, a)]
-                    n_visits = self.nodes[depth].Nsa[(s, a)]
-                    ucb_values[a] = q_value + cpuct * policy[a] * sqrt_total_visits / (1 + n_visits)
-                else:
-                    # Pure exploration for unvisited nodes
-                    ucb_values[a] = cpuct * policy[a] * sqrt_total_visits
+        self._backup(path, v)
+
+    def _revertVirtualLoss(self, path):
+        """
+        Removes the virtual loss applied along a descent path once its
+        simulation has been resolved.
+        """
+        for depth, s, a in path:
+            vl = self.nodes[depth].Vl.get((s, a), 0) - 1
+            if vl > 0:
+                self.nodes[depth].Vl[(s, a)] = vl
             else:
-                # Invalid moves get -infinity
-                ucb_values[a] = -float('inf')
-                
-        # Find the best action (argmax)
-        best_act = np.argmax(ucb_values)
-
-        # Execute the chosen action and recurse
-        a = best_act
-        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)  # Get next state and player
-        next_s = self.game.getCanonicalForm(next_s, next_player)  # Convert to canonical form
-
-        # Recur on the next state and get its value
-        v = self.search(next_s)
-
-        # Update Qsa, Nsa, and Ns for the current state-action pair
-        if (s, a) in self.nodes[depth].Qsa:
-            # Vectorized update rule
-            n_visits = self.nodes[depth].Nsa[(s, a)]
-            q_value = self.nodes[depth].Qsa[(s, a)]
-            self.nodes[depth].Qsa[(s, a)] = (n_visits * q_value + v) / (n_visits + 1)   
-            self.nodes[depth].Nsa[(s, a)] += 1
-        else:
-            self.nodes[depth].Qsa[(s, a)] = v
-            self.nodes[depth].Nsa[(s, a)] = 1
-    
-        self.nodes[depth].Ns[s] += 1  # Increment visit count for the state
-        return -v
\ No newline at end of file
+                self.nodes[depth].Vl.pop((s, a), None)
+
+    def _backup(self, path, v):
+        """
+        Propagates a leaf value back along the descent path, flipping its sign
+        at every edge since players alternate between consecutive states.
+
+        Args:
+            path: List of (depth, s, a) edges from the root to the leaf.
+            v: Value of the leaf state, from the leaf player's perspective.
+        """
+        for depth, s, a in reversed(path):
+            v = -v
+
+            # Update Qsa, Nsa, and Ns for the state-action pair
+            if (s, a) in self.nodes[depth].Qsa:
+                n_visits = self.nodes[depth].Nsa[(s, a)]
+                q_value = self.nodes[depth].Qsa[(s, a)]
+                self.nodes[depth].Qsa[(s, a)] = (n_visits * q_value + v) / (n_visits + 1)
+                self.nodes[depth].Nsa[(s, a)] += 1
+            else:
+                self.nodes[depth].Qsa[(s, a)] = v
+                self.nodes[depth].Nsa[(s, a)] = 1
+
+            self.nodes[depth].Ns[s] += 1  # Increment visit count for the state
+
+
+class RootParallelMCTS():
+    """
+    Root parallelization: searches several fully independent trees over the
+    same position on worker threads and merges their root visit counts into
+    one policy. The trees share nothing, so there are no locks; while one
+    tree waits on a network forward (which releases the GIL) another runs
+    its Python descent. Exposes the getActionProb/reset interface self-play
+    uses, so it drops in where a single MCTS would go.
+    """
+    def __init__(self, game, nnet, args, numRoots):
+        self.args = args
+        # The LRU inference cache is not thread-safe, so the roots run uncached
+        self.trees = [MCTS(game, nnet, args) for _ in range(numRoots)]
+        self.simsPerRoot = max(1, args.numMCTSSims // numRoots)
+        self.rng = np.random.default_rng()
+        self._pool = ThreadPoolExecutor(max_workers=numRoots)
+
+    def reset(self):
+        """Clears every tree for a new episode."""
+        for tree in self.trees:
+            tree.reset()
+
+    def getActionProb(self, canonicalBoard, temp=1):
+        """
+        Runs simsPerRoot simulations on every tree in parallel and returns the
+        policy derived from the summed visit counts.
+        """
+        def run(tree):
+            for _ in range(self.simsPerRoot):
+                tree.search(canonicalBoard)
+            return tree._visitCounts(canonicalBoard)
+
+        counts = sum(self._pool.map(run, self.trees))
+        return _probsFromCounts(counts, temp, self.rng)
\ No newline at end of file
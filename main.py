@@ -37,6 +37,7 @@ args = dotdict({
     'maxlenOfQueue': 200000,    # Number of game examples to train the neural networks.
     'numMCTSSims': 10000, ## Number of games moves for MCTS to simulate. 18496
     'arenaCompare': 20,
+    'numArenaWorkers': 1,       # Worker processes for arena games. 1 keeps the sequential arena.
     'cpuct': 2,
 
     'checkpoint': './checkpoints/',
@@ -48,6 +49,20 @@ args = dotdict({
     'load_folder_file': ('./13_03', 'checkpoint_1.pth.tar'),
     'starting_iteration': 1,
     'numItersForTrainExamplesHistory': 100,
+    'fullHistorySaveEvery': 5,  # Iterations between full trainExamplesHistory dumps; per-iteration files are always written.
+    'appendOnlyExamples': False,  # Skip full-history dumps; resume relies on the per-iteration files alone.
+    'exampleFormat': 'pickle',  # Example file format: 'pickle' (legacy), 'tensor' (torch.save blob) or 'npz' (compressed arrays).
+    'driveBackupFolder': None,  # Mirror saved examples/best checkpoint here (e.g. a Drive mount). None disables.
+    'asyncExampleWrites': False,  # Serialize and write example files in a background process.
+    'numSelfPlayWorkers': 1,    # Worker processes for self-play. 1 keeps the sequential loop.
+    'numSelfPlayGPUs': 1,       # GPUs to spread the self-play workers over (round-robin).
+    'sharedMemoryExamples': False,  # Hand worker examples back through shared memory instead of pickling them.
+    'numParallelGames': 1,      # Games advanced in lock-step with batched NN inference. 1 disables batching.
+    'leavesPerGame': 1,         # In-flight simulations per game per batched step; >1 applies virtual loss.
+    'numSearchRoots': 1,        # Independent trees searched on threads per move, visit counts merged. 1 disables.
+    'inferenceCacheSize': 100000,  # Max cached NN predictions for transpositions during self-play. 0 disables the cache.
+    'piDtype': 'float16',       # In-memory dtype for stored policy vectors; 'float32' opts out of the downcast.
+    'pipelineTraining': False,  # Overlap training with the next iteration's self-play (no arena only).
     'verbose': True,
 
 })
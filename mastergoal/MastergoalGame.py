@@ -1,7 +1,6 @@
 from __future__ import print_function
 
 from Game import Game
-import copy
 from .MastergoalLogic import MastergoalBoard, NUM_PLANES, ACTION_SIZE
 import numpy as np
 
@@ -43,7 +42,7 @@ class MastergoalGame(Game):
             nextBoard: board after applying action
             nextPlayer: player who plays in the next turn (should be -player)
         """
-        new_board = copy.deepcopy(board)
+        new_board = board.copy()
         new_board.performMove(action, verbose)
         return new_board, -player
 
@@ -40,31 +40,52 @@ class MastergoalBoard():
         self.ball_row = 7
         self.ball_col = 5
 
-    def encode(self):
-        # Crea un array de ceros con shape (5, 15, 11)
-        board = np.zeros((NUM_PLANES, self.rows, self.cols))
-
-        # Iteramos sobre el tablero para colocar cada pieza en la capa correcta
-        for r in range(self.rows):
-            for c in range(self.cols):
-                piece = self.pieces[r, c]
-                if piece == Pieces.WHITE_PLAYER:
-                    board[PLAYER_PIECE_LAYER, r, c] = 1
-                elif piece == Pieces.RED_PLAYER:
-                    board[OPPONENT_PIECE_LAYER, r, c] = 1
-                elif abs(piece) == Pieces.BALL:
-                    board[BALL_LAYER, r, c] = 1
-
-        # Capa del jugador en turno (1 para blanco, -1 para rojo)
-        if not self.red_turn:
-            board[PLAYER_LAYER, :, :] = 1
-        else:
-            board[PLAYER_LAYER, :, :] = -1
+        # Memoized hash key and encoded planes, recomputed lazily after each move
+        self._hash_key = None
+        self._encoded = None
 
-        # Capa de conteo de movimientos (rellena todo con el número de movimientos actual)
-        board[MOVE_COUNT_LAYER, :, :] = self.move_count
-
-        return board
+    def encode(self):
+        # The planes only change in performMove, so they are built lazily once
+        # per state and memoized like the hash key. int8 is enough for every
+        # plane (the turn plane holds -1, the move counter tops out at 40) and
+        # the array is C-contiguous so tensor conversion is a straight copy.
+        if self._encoded is None:
+            # Crea un array de ceros con shape (5, 15, 11)
+            board = np.zeros((NUM_PLANES, self.rows, self.cols), dtype=np.int8)
+
+            # Mascaras vectorizadas para colocar cada pieza en la capa correcta
+            board[PLAYER_PIECE_LAYER] = self.pieces == Pieces.WHITE_PLAYER
+            board[OPPONENT_PIECE_LAYER] = self.pieces == Pieces.RED_PLAYER
+            board[BALL_LAYER] = np.abs(self.pieces) == Pieces.BALL
+
+            # Capa del jugador en turno (1 para blanco, -1 para rojo)
+            board[PLAYER_LAYER] = -1 if self.red_turn else 1
+
+            # Capa de conteo de movimientos (rellena todo con el número de movimientos actual)
+            board[MOVE_COUNT_LAYER] = self.move_count
+
+            self._encoded = board
+
+        return self._encoded
+
+    def copy(self):
+        # Copia rapida para la generacion de movimientos: clona el array de
+        # piezas y el estado escalar directamente, sin el recorrido recursivo
+        # de deepcopy. Los memos quedan vacios porque la copia se va a mutar.
+        new = MastergoalBoard.__new__(MastergoalBoard)
+        new.rows = self.rows
+        new.cols = self.cols
+        new.pieces = self.pieces.copy()
+        new.red_turn = self.red_turn
+        new.red_goals = self.red_goals
+        new.white_goals = self.white_goals
+        new.goals_to_win = self.goals_to_win
+        new.move_count = self.move_count
+        new.ball_row = self.ball_row
+        new.ball_col = self.ball_col
+        new._hash_key = None
+        new._encoded = None
+        return new
 
     def getInitialPieces(self):
         pieces = np.zeros((self.rows, self.cols), dtype='int8')
@@ -283,6 +304,9 @@ class MastergoalBoard():
         self.ball_row = self.rows - 1 - self.ball_row
 
         self.red_turn = not self.red_turn
+        # State changed, memoized derivations are stale
+        self._hash_key = None
+        self._encoded = None
 
     def is_ball_adjacent(self, row, col):
         return abs(row - self.ball_row) <= 1 and abs(col - self.ball_col) <= 1  
@@ -392,7 +416,13 @@ class MastergoalBoard():
 
 
     def hashKey(self):
-        return f"{np.array2string(self.pieces)}${self.red_turn}${self.red_goals}${self.white_goals}"
+        # MCTS hashes the same state twice per simulation (game-end check and
+        # node lookup) and identical states recur across simulations, while
+        # the underlying bytes only change in performMove — so the key is
+        # computed once per state and memoized
+        if self._hash_key is None:
+            self._hash_key = f"{self.pieces.tobytes()}${self.red_turn}${self.red_goals}${self.white_goals}"
+        return self._hash_key
 
     def display(self):
         """Muestra el tablero de Mastergoal en la consola."""